@@ -86,6 +86,16 @@ class ColoredFormatter(logging.Formatter):
 # Add critical level
 critical = lg.critical
 
+# Skip log level updates that would not change anything
+_setLogLevel = setLogLevel
+
+def setLogLevel(levelname=None):
+    """Sets the log level, unless both the logger and its handler already use it."""
+    if levelname in LEVELS and \
+       lg.level == LEVELS[levelname] and lg.ch.level == LEVELS[levelname]:
+        return
+    _setLogLevel(levelname)
+
 # Set formatter
 formatter = ColoredFormatter( LOGMSGFORMAT )
 lg.ch.setFormatter( formatter )
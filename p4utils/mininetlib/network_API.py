@@ -10,7 +10,9 @@ instantiate and start the network.
 
 import os
 import time
-from ipaddress import ip_interface, IPv4Network
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from ipaddress import ip_address, ip_interface, IPv4Network
 from networkx import Graph, MultiGraph
 from networkx.readwrite.json_graph import node_link_data
 from mininet.link import TCLink
@@ -233,28 +235,63 @@ class NetworkAPI(Topo):
             json.dump(graph_dict, f, default=default)
 
     def compile(self):
-        """Compiles all the required P4 files."""
+        """Compiles all the required P4 files.
+
+        Distinct P4 sources handled by :py:class:`~p4utils.utils.compiler.P4C`
+        are compiled concurrently, since each compilation runs in a separate
+        ``p4c`` process. Other compilers (e.g. Tofino builds, which share build
+        and install directories) are run one at a time.
+        """
+        # Resolve the path of each P4 source only once
+        realpaths = {}
+        p4_srcs = {}
         for p4switch in self.p4switches():
             p4_src = self.getNode(p4switch).get('p4_src')
             if p4_src is not None:
-                if not is_compiled(os.path.realpath(p4_src), self.compilers):
-                    compiler = self.module('comp', p4_src)
-                    compiler.compile()
-                    self.compilers.append(compiler)
-                else:
-                    compiler = get_by_attr(
-                        'p4_src', os.path.realpath(p4_src),
-                        self.compilers)
-                if not self.isTofino(p4switch):
-                    # Retrieve json_path
+                if p4_src not in realpaths:
+                    realpaths[p4_src] = os.path.realpath(p4_src)
+                p4_srcs[p4switch] = realpaths[p4_src]
+
+        # Index the already compiled sources by path
+        compilers = {}
+        for compiler in self.compilers:
+            if compiler.compiled:
+                compilers.setdefault(compiler.p4_src, compiler)
+
+        # Create a compiler for each P4 source not compiled yet
+        new_compilers = {}
+        for p4_src, p4_src_path in realpaths.items():
+            if p4_src_path not in compilers and \
+               p4_src_path not in new_compilers:
+                new_compilers[p4_src_path] = self.module('comp', p4_src)
+
+        # Compile the new sources
+        if new_compilers:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                futures = []
+                for compiler in new_compilers.values():
+                    if isinstance(compiler, P4C):
+                        futures.append(executor.submit(compiler.compile))
+                    else:
+                        compiler.compile()
+                # Propagate compilation errors
+                for future in futures:
+                    future.result()
+            self.compilers.extend(new_compilers.values())
+            compilers.update(new_compilers)
+
+        for p4switch, p4_src_path in p4_srcs.items():
+            compiler = compilers[p4_src_path]
+            if not self.isTofino(p4switch):
+                # Retrieve json_path
+                self.updateNode(
+                    p4switch, json_path=compiler.get_json_out())
+                # Try to retrieve p4 runtime info file path
+                try:
                     self.updateNode(
-                        p4switch, json_path=compiler.get_json_out())
-                    # Try to retrieve p4 runtime info file path
-                    try:
-                        self.updateNode(
-                            p4switch, p4rt_path=compiler.get_p4rt_out())
-                    except P4InfoDisabled:
-                        pass
+                        p4switch, p4rt_path=compiler.get_p4rt_out())
+                except P4InfoDisabled:
+                    pass
 
     def program_switches(self):
         """If any command files were provided for the switches, this method will start up the
@@ -266,15 +303,28 @@ class NetworkAPI(Topo):
 
           A *Mininet* network instance is stored in the attribute ``net`` (see `here`__).
         - :py:meth:`self.net.start()` has been called.
+
+        Switches are configured concurrently, since each one is programmed
+        by a separate client process.
         """
+        sw_clients = []
         for p4switch, info in self.p4switches(withInfo=True):
             cli_input = info.get('cli_input')
             thrift_port = info.get('thrift_port')
             if cli_input is not None:
                 sw_client = self.module(
                     'sw_cli', thrift_port, p4switch, cli_input=cli_input)
-                sw_client.configure()
-                self.sw_clients.append(sw_client)
+                sw_clients.append(sw_client)
+
+        # Configure the switches in parallel
+        if sw_clients:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                futures = [executor.submit(sw_client.configure)
+                           for sw_client in sw_clients]
+                # Propagate configuration errors
+                for future in futures:
+                    future.result()
+            self.sw_clients.extend(sw_clients)
 
     def program_hosts(self):
         """Adds static and default routes ARP entries to each mininet host.
@@ -289,70 +339,94 @@ class NetworkAPI(Topo):
           A *Mininet* network instance is stored in the attribute ``net`` (see `here`__).
         - :py:meth:`self.net.start()` has been called.
         """
+        # Parse the addresses of the hosts' interfaces only once
+        # and group the interfaces by subnet
+        hosts_nets = {}
+        subnets = {}
+        if self.auto_arp_tables or self.auto_gw_arp:
+            for host in self.hosts():
+                host_nets = hosts_nets[host] = []
+                for intf in self.net.get(host).intfs.values():
+                    # Skip loopback and unconfigured interfaces
+                    if intf.name == 'lo' or intf.ip is None:
+                        continue
+                    net = ip_interface(
+                        '{}/{}'.format(intf.ip, intf.prefixLen)).network
+                    host_nets.append((intf.name, net))
+                    subnets.setdefault(net, []).append(
+                        (host, intf.ip, intf.mac))
+
+        # Map every IP in the network to the nodes and MACs it belongs to,
+        # so that gateways can be resolved without scanning all the nodes
+        nodes_macs = {}
+        if self.auto_gw_arp and any('defaultRoute' in self.net.get(host).params
+                                    for host in self.hosts()):
+            for node in self.nodes():
+                n = self.net.get(node)
+                for intf in n.intfs.values():
+                    # Skip loopback interface
+                    if intf.name == 'lo':
+                        continue
+                    # If it is a switch, handle fake IPs
+                    if self.isSwitch(node):
+                        # Get link from interface
+                        link = intf.link
+                        # Get fake IP
+                        n_ip = intf.params.get(
+                            'sw_ip1') if intf == link.intf1 else intf.params.get('sw_ip2')
+                    else:
+                        n_ip = intf.ip
+                    if n_ip is not None:
+                        n_ip = n_ip.split('/')[0]
+                        nodes_macs.setdefault(n_ip, []).append((node, intf.mac))
+
         for host1, info in self.hosts(withInfo=True):
             # Get mininet node
             h1 = self.net.get(host1)
+            h1_nets = hosts_nets.get(host1, [])
+            # Neighbor entries are collected and installed by a single
+            # ip command (see set_neighbors)
+            neighbors = []
             # Set gateway static ARP
             if self.auto_gw_arp:
                 # If there is gateway assigned
                 if 'defaultRoute' in h1.params:
-                    # Get gateway IP
-                    gw_ip = h1.params['defaultRoute'].split()[-1]
-                    for node in self.nodes():
-                        if host1 == node:
-                            continue
-                        n = self.net.get(node)
-                        # If it is a switch, handle fake IPs
-                        if self.isSwitch(node):
-                            for intf in n.intfs.values():
-                                # Skip loopback interface
-                                if intf.name == 'lo':
-                                    continue
-                                # Get link from interface
-                                link = intf.link
-                                # Get fake IP
-                                n_ip = intf.params.get(
-                                    'sw_ip1') if intf == link.intf1 else intf.params.get('sw_ip2')
-                                if n_ip is not None:
-                                    n_ip = n_ip.split('/')[0]
-                                    # Check if the IPs match and set ARP
-                                    if n_ip == gw_ip:
-                                        h1.setARP(gw_ip, intf.mac)
-                        else:
-                            for intf in n.intfs.values():
-                                # Skip loopback interface
-                                if intf.name == 'lo':
-                                    continue
-                                n_ip = intf.ip
-                                if n_ip is not None:
-                                    n_ip = n_ip.split('/')[0]
-                                    # Check if the IPs match and set ARP
-                                    if n_ip == gw_ip:
-                                        h1.setARP(gw_ip, intf.mac)
+                    # Get gateway IP (routes such as "dev <intf>" have none)
+                    route = h1.params['defaultRoute'].split()
+                    gw_addr = None
+                    if 'via' in route[:-1]:
+                        gw_ip = route[route.index('via') + 1]
+                        try:
+                            gw_addr = ip_address(gw_ip)
+                        except ValueError:
+                            pass
+                    if gw_addr is not None:
+                        # Get the interface towards the gateway
+                        default_intf = h1.defaultIntf()
+                        gw_intf = default_intf.name if default_intf is not None else None
+                        for intf_name, net in h1_nets:
+                            if gw_addr in net:
+                                gw_intf = intf_name
+                                break
+                        # Check if the IPs match and set ARP
+                        for node, mac in nodes_macs.get(gw_ip, []):
+                            # Skip the host itself or if it has no interfaces
+                            if host1 == node or gw_intf is None:
+                                continue
+                            neighbors.append((gw_ip, mac, gw_intf))
 
             # Set static ARP entries
             if self.auto_arp_tables:
-                for intf1 in h1.intfs.values():
-                    # Skip loopback interface
-                    if intf1.name == 'lo':
-                        continue
+                for h1_intf, h1_net in h1_nets:
                     # Set arp rules for all the hosts in the same subnet
-                    h1_intf_ip = ip_interface(
-                        '{}/{}'.format(intf1.ip, intf1.prefixLen))
-                    for host2 in self.hosts():
+                    for host2, h2_ip, h2_mac in subnets[h1_net]:
                         if host1 == host2:
                             continue
-                        h2 = self.net.get(host2)
-                        for intf2 in h2.intfs.values():
-                            # Skip loopback interface
-                            if intf2.name == 'lo':
-                                continue
-                            # Get the other interface's IP
-                            h2_intf_ip = ip_interface(
-                                '{}/{}'.format(intf2.ip, intf2.prefixLen))
-                            # Check if the subnet is the same
-                            if h1_intf_ip.network.compressed == h2_intf_ip.network.compressed:
-                                h1.setARP(intf2.ip, intf2.mac)
+                        neighbors.append((h2_ip, h2_mac, h1_intf))
+
+            # Install all the ARP entries at once
+            if neighbors:
+                self.set_neighbors(h1, neighbors)
 
             # Set DHCP autoconfiguration
             if info.get('dhcp', False):
@@ -363,6 +437,31 @@ class NetworkAPI(Topo):
                     h1.cmd('dhclient -r {}'.format(intf1.name))
                     h1.cmd('dhclient {} &'.format(intf1.name))
 
+    def set_neighbors(self, node, neighbors):
+        """Adds permanent ARP entries to the node using a single
+        ``ip -batch`` invocation.
+
+        Args:
+            node (object)   : *Mininet* node object
+            neighbors (list): list of ``(ip, mac, intf_name)`` tuples
+
+        Note:
+            The batch is fed to ``ip`` through its standard input, so that
+            its size is not limited by the node's shell.
+        """
+        batch = ''
+        for ip, mac, intf_name in neighbors:
+            batch += 'neigh replace {} lladdr {} dev {} nud permanent\n'.format(
+                ip, mac, intf_name)
+        p = node.popen(['ip', '-force', '-batch', '-'],
+                       stdin=subprocess.PIPE,
+                       stdout=subprocess.PIPE,
+                       stderr=subprocess.STDOUT)
+        stdout, _ = p.communicate(batch.encode())
+        if p.returncode != 0:
+            warning('Node {}: could not set ARP entries:\n{}'.format(
+                node.name, stdout.decode(errors='backslashreplace')))
+
     def exec_scripts(self):
         """Executes the scripts in the main namespace after network boot."""
         for script in self.scripts:
@@ -759,6 +858,13 @@ class NetworkAPI(Topo):
         It assignes unique *MACs* addresses to the every non-host node that
         was not configured manually or through an assignment strategy.
         """
+        # Collect the values already in use only once (see auto_switch_id,
+        # auto_thrift_port and auto_grpc_port for the default bases)
+        switch_ids = free_elements(self.switch_ids(), minimum=1)
+        used_ports = self.thrift_ports().union(self.grpc_ports())
+        thrift_ports = free_elements(used_ports, minimum=9090)
+        grpc_ports = free_elements(used_ports, minimum=9559)
+
         # Set nodes' parameters automatically
         for node, info in self.nodes(sort=True, withInfo=True):
 
@@ -767,13 +873,13 @@ class NetworkAPI(Topo):
                 # Device IDs
                 device_id = info.get('device_id')
                 if device_id is None:
-                    device_id = self.auto_switch_id()
+                    device_id = next(switch_ids)
                     self.setP4SwitchId(node, device_id)
 
                 # Thrift ports
                 thrift_port = info.get('thrift_port')
                 if thrift_port is None:
-                    thrift_port = self.auto_thrift_port()
+                    thrift_port = next(thrift_ports)
                     self.setThriftPort(node, thrift_port)
 
                 if self.isP4RuntimeSwitch(node):
@@ -781,7 +887,7 @@ class NetworkAPI(Topo):
                     # GRPC ports
                     grpc_port = info.get('grpc_port')
                     if grpc_port is None:
-                        grpc_port = self.auto_grpc_port()
+                        grpc_port = next(grpc_ports)
                         self.setGrpcPort(node, grpc_port)
 
             elif self.isSwitch(node):
@@ -789,7 +895,7 @@ class NetworkAPI(Topo):
                 # DPIDs
                 dpid = info.get('dpid')
                 if dpid is None:
-                    device_id = self.auto_switch_id()
+                    device_id = next(switch_ids)
                     dpid = dpidToStr(device_id)
                     self.setSwitchDpid(node, dpid)
 
@@ -1099,15 +1205,22 @@ class NetworkAPI(Topo):
 
     def startNetwork(self):
         """Starts and configures the network."""
-        debug('Cleanup old files and processes...\n')
-        self.cleanup()
-
-        debug('Auto configuration of not configured interfaces...\n')
-        self.auto_assignment()
-
-        info('Compiling P4 files...\n')
-        self.compile()
-        output('P4 Files compiled!\n')
+        # The cleanup only needs to complete before the network is
+        # created, hence it runs while the P4 files are compiled
+        # (its messages may interleave with the compilation ones)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            debug('Cleanup old files and processes...\n')
+            cleanup_future = executor.submit(self.cleanup)
+
+            debug('Auto configuration of not configured interfaces...\n')
+            self.auto_assignment()
+
+            info('Compiling P4 files...\n')
+            self.compile()
+            output('P4 Files compiled!\n')
+
+            # Propagate cleanup errors
+            cleanup_future.result()
 
         self.printPortMapping()
 
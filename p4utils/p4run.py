@@ -27,6 +27,7 @@ configure all the components of the virtualized network.
 """
 
 import argparse
+import shutil
 from copy import deepcopy
 from mininet.clean import cleanup, sh
 
@@ -221,12 +222,11 @@ class AppRunner(NetworkAPI):
 
         # Ensure that all the needed directories exist and are directories
         if self.log_enabled:
-            if not os.path.isdir(self.log_dir):
-                if os.path.exists(self.log_dir):
-                    raise FileExistsError("'{}' exists and is not a directory!".format(self.log_dir))
-                else:
-                    debug('Creating directory {} for logs.\n'.format(self.log_dir))
-                    os.mkdir(self.log_dir)
+            debug('Using directory {} for logs.\n'.format(self.log_dir))
+            try:
+                os.makedirs(self.log_dir, exist_ok=True)
+            except FileExistsError:
+                raise FileExistsError("'{}' exists and is not a directory!".format(self.log_dir)) from None
         
         os.environ['P4APP_LOGDIR'] = self.log_dir
 
@@ -235,12 +235,11 @@ class AppRunner(NetworkAPI):
 
         # Ensure that all the needed directories exist and are directories
         if self.pcap_dump:
-            if not os.path.isdir(self.pcap_dir):
-                if os.path.exists(self.pcap_dir):
-                    raise FileExistsError("'{}' exists and is not a directory!".format(self.pcap_dir))
-                else:
-                    debug('Creating directory {} for pcap files.\n'.format(self.pcap_dir))
-                    os.mkdir(self.pcap_dir)
+            debug('Using directory {} for pcap files.\n'.format(self.pcap_dir))
+            try:
+                os.makedirs(self.pcap_dir, exist_ok=True)
+            except FileExistsError:
+                raise FileExistsError("'{}' exists and is not a directory!".format(self.pcap_dir)) from None
 
         ## Mininet nodes
         # Load default router node
@@ -283,6 +282,9 @@ class AppRunner(NetworkAPI):
                 compiler = DEFAULT_COMPILER
             # Load compiler module default arguments
             compiler_kwargs = compiler_module.get('options', {})
+        # Cache compiled outputs, unless specified otherwise
+        if compiler is DEFAULT_COMPILER and 'cache_dir' not in compiler_kwargs:
+            compiler_kwargs = dict(compiler_kwargs, cache_dir='./.p4cache')
         self.setCompiler(compiler, **compiler_kwargs)
 
         # Load default client module
@@ -391,12 +393,11 @@ class AppRunner(NetworkAPI):
         """
         default_params = {
                             'log_enabled': self.log_enabled,
-                            'log_dir': self.log_dir,
-                            'host_node': deepcopy(self.host_node),
+                            'log_dir': self.log_dir
                          }
         for host, custom_params in unparsed_hosts.items():
             # Set general default host options
-            params = deepcopy(default_params)
+            params = dict(default_params)
 
             ## Parse Host node type
             # Set non default node type (the module JSON is converted into a Host object)
@@ -405,9 +406,7 @@ class AppRunner(NetworkAPI):
                 # This field is not propagated further
                 del custom_params['host_node']
             else:
-                params['cls'] = params['host_node']
-            # This field is not propagated further
-            del params['host_node']
+                params['cls'] = self.host_node
 
             # Update default parameters with custom ones
             params.update(custom_params)
@@ -450,7 +449,6 @@ class AppRunner(NetworkAPI):
         """
         default_params = {
                             'p4_src': self.conf.get('p4_src'),
-                            'switch_node': deepcopy(self.switch_node),
                             'pcap_dump': self.pcap_dump,
                             'pcap_dir': self.pcap_dir,
                             'log_enabled': self.log_enabled,
@@ -460,7 +458,7 @@ class AppRunner(NetworkAPI):
         for switch, custom_params in unparsed_switches.items():
 
             # Set general default switch options
-            params = deepcopy(default_params)
+            params = dict(default_params)
 
             ## Parse Switch node type
             # Set non default node type (the module JSON is converted into a Switch object)
@@ -469,9 +467,7 @@ class AppRunner(NetworkAPI):
                 # This field is not propagated further
                 del custom_params['switch_node']
             else:
-                params['cls'] = params['switch_node']
-            # This field is not propagated further
-            del params['switch_node']
+                params['cls'] = self.switch_node
 
             # Update default parameters with custom ones
             params.update(custom_params)
@@ -534,7 +530,6 @@ class AppRunner(NetworkAPI):
             then ``conf_dir`` is ignored.
         """
         default_params = {
-                            'router_node': deepcopy(self.router_node),
                             'zebra': True,
                             'ospfd': True,
                             'staticd': True,
@@ -543,7 +538,7 @@ class AppRunner(NetworkAPI):
         
         for router, custom_params in unparsed_routers.items():
             # Set general default router options
-            params = deepcopy(default_params)
+            params = dict(default_params)
 
             ## Parse Router node type
             # Set non default node type (the module JSON is converted into a Router object)
@@ -552,9 +547,7 @@ class AppRunner(NetworkAPI):
                 # This field is not propagated further
                 del custom_params['router_node']
             else:
-                params['cls'] = params['router_node']
-            # This field is not propagated further
-            del params['router_node']
+                params['cls'] = self.router_node
 
             # Update default parameters with custom ones
             params.update(custom_params)
@@ -672,6 +665,11 @@ def get_args():
     - ``--no-cli`` disables the *Mininet* client (it is enabled by default).
     - ``--clean`` cleans old log files, if specified.
     - ``--clean-dir`` cleans old log files and closes, if specified.
+
+    Note:
+        Compiled P4 outputs are cached in ``./.p4cache`` within the working
+        directory, so that unchanged P4 programs are not compiled again on
+        the next run. ``--clean`` and ``--clean-dir`` also remove this cache.
     """
 
     cwd = os.getcwd()
@@ -698,6 +696,58 @@ def get_args():
     return parser.parse_args()
 
 
+def clean_files(log_dir, pcap_dir):
+    """Removes the files created by old executions from the current directory tree.
+
+    Args:
+        log_dir (str) : path to the log directory
+        pcap_dir (str): path to the pcap directory
+
+    The whole tree is scanned only once and every file is removed without
+    spawning external processes. The following items are removed:
+
+    - ``log_dir`` and ``pcap_dir``,
+    - the compiler cache (``./.p4cache``),
+    - all the directories named ``log`` or ``pcap``,
+    - topology files (``*topology.json``),
+    - compiler outputs (``*.p4i``, ``*.p4rt`` and the JSON files named
+      after a ``.p4`` source found in the tree).
+    """
+    # Removes first level pcap and log dirs
+    shutil.rmtree(pcap_dir, ignore_errors=True)
+    shutil.rmtree(log_dir, ignore_errors=True)
+    # Removes cached compiler outputs, so that P4 files are compiled again
+    shutil.rmtree('./.p4cache', ignore_errors=True)
+
+    p4_jsons = set()
+    json_files = []
+    for root, dirs, files in os.walk('.'):
+        # Recursively remove all pcap and log dirs if they are named 'log' and 'pcap'
+        for d in [d for d in dirs if d in ('log', 'pcap')]:
+            shutil.rmtree(os.path.join(root, d), ignore_errors=True)
+            dirs.remove(d)
+        for f in files:
+            path = os.path.join(root, f)
+            # Removes topologies files and compiler outputs
+            if f.endswith(('topology.json', 'p4i', 'p4rt')):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            elif f.endswith('.json'):
+                json_files.append(path)
+            elif f.endswith('.p4'):
+                p4_jsons.add(f[:-len('.p4')] + '.json')
+
+    # Remove all the jsons that come from a p4
+    for path in json_files:
+        if os.path.basename(path) in p4_jsons:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
 def main():
     """Cleans up files created by old executions and starts the virtual network."""
 
@@ -711,24 +761,7 @@ def main():
         sh("brctl delbr {}".format(bridge))
 
     if args.clean or args.clean_dir:
-        # Removes first level pcap and log dirs
-        sh("rm -rf %s" % args.pcap_dir)
-        sh("rm -rf %s" % args.log_dir)
-        # Tries to recursively remove all pcap and log dirs if they are named 'log' and 'pcap'
-        sh('find -type d -regex ".*pcap" | xargs rm -rf')
-        sh('find -type d -regex ".*log" | xargs rm -rf')
-        # Removes topologies files
-        sh('find -type f -regex ".*topology.json" | xargs rm')
-        # Remove compiler outputs
-        sh('find -type f -regex ".*\(p4i\|p4rt\)" | xargs rm')
-
-        # Remove all the jsons that come from a p4
-        out = sh('find -type f -regex ".*p4"')
-        p4_files = [x.split("/")[-1].strip() for x in out.split("\n") if x]
-        for p4_file in p4_files:
-            tmp = p4_file.replace("p4", "json")
-            reg_str = ".*{}".format(tmp)
-            sh('find -type f -regex {} | xargs rm -f'.format(reg_str))
+        clean_files(args.log_dir, args.pcap_dir)
 
         if args.clean_dir:
             return
@@ -1,5 +1,7 @@
 import os
+import re
 import shlex 
+import shutil
 import hashlib
 import subprocess
 
@@ -19,6 +21,51 @@ class P4InfoDisabled(Exception):
     pass
 
 
+_includeRegex = re.compile(r'^\s*#\s*include\s+(?:"([^"]+)"|<([^>]+)>)', re.MULTILINE)
+
+
+def p4_sources(p4_src, include_dirs=None):
+    """Returns the P4 source file together with all the local files
+    it includes, directly or indirectly.
+
+    Args:
+        p4_src (str)       : path of the P4 source file
+        include_dirs (list): additional include directories (``-I`` options)
+
+    Returns:
+        set: real paths of the P4 source and of its local includes.
+
+    Note:
+        ``#include "..."`` directives are looked up relative to the including
+        file first and then in ``include_dirs``, while ``#include <...>``
+        directives are looked up in ``include_dirs`` only. Includes that are
+        not found there (e.g. ``#include <core.p4>``) belong to the compiler
+        installation and are not tracked.
+    """
+    if include_dirs is None:
+        include_dirs = []
+    sources = set()
+    stack = [os.path.realpath(p4_src)]
+    while stack:
+        src = stack.pop()
+        if src in sources:
+            continue
+        sources.add(src)
+        with open(src, 'r', errors='replace') as f:
+            content = f.read()
+        for local, system in _includeRegex.findall(content):
+            if local:
+                search_dirs = [os.path.dirname(src)] + include_dirs
+            else:
+                search_dirs = include_dirs
+            for search_dir in search_dirs:
+                include = os.path.realpath(os.path.join(search_dir, local or system))
+                if os.path.isfile(include):
+                    stack.append(include)
+                    break
+    return sources
+
+
 class P4C:
     """This compiler reads the P4 program and generates
     the configuration files used by switches.
@@ -31,6 +78,15 @@ class P4C:
         opts (str)   : ``p4c`` compilation options
         p4rt (bool)  : generate the P4Info file used to establish P4Runtime connection
                        to ``simple_switch_grpc``
+        cache_dir (str): directory where compiled outputs are cached. If set to **None**
+                         (default), the cache is disabled
+
+    Note:
+        Compiled outputs are cached using a key computed from the content of the
+        P4 source and of the files it includes (see :py:func:`p4_sources`), the
+        compiler version and binary, and the compilation options. If the key is
+        found in ``cache_dir``, the outputs are copied from the cache and ``p4c``
+        is not run. Files included from the compiler installation are not tracked.
     """
     p4c_bin = 'p4c'
 
@@ -44,6 +100,7 @@ class P4C:
                  outdir=None,
                  opts='--target bmv2 --arch v1model --std p4-16',
                  p4rt=False,
+                 cache_dir=None,
                  **kwargs):
 
         if p4c_bin is not None:
@@ -72,6 +129,7 @@ class P4C:
 
         self.opts = opts
         self.p4rt = p4rt
+        self.cache_dir = cache_dir
         self.compiled = False
         
         p4_basename = os.path.basename(self.p4_src)
@@ -87,6 +145,13 @@ class P4C:
         self.cksum = cksum(self.p4_src)
         debug('source: {}\tcksum: {}\n'.format(self.p4_src, self.cksum))
 
+        # Look for the outputs in the cache
+        if self.cache_dir is not None:
+            key = self.cache_key()
+            if self.load_cache(key):
+                self.compiled = True
+                return
+
         # Compiler command to execute
         cmd = self.p4c_bin + ' '
         cmd += '"{}" '.format(self.p4_src)
@@ -118,6 +183,91 @@ class P4C:
                 info(stdout.decode(errors='backslashreplace'))
                 warning(stderr.decode(errors='backslashreplace'))
             self.compiled = True
+            if self.cache_dir is not None:
+                self.save_cache(key, stderr.decode(errors='backslashreplace'))
+
+    def cache_key(self):
+        """Computes the key used to store the compiled outputs in the cache.
+
+        Returns:
+            str: SHA-256 digest of the sources, compiler and options.
+        """
+        h = hashlib.sha256()
+        # Sources
+        opts = shlex.split(self.opts)
+        include_dirs = []
+        for i, opt in enumerate(opts):
+            if opt == '-I' and i + 1 < len(opts):
+                include_dirs.append(opts[i + 1])
+            elif opt.startswith('-I') and len(opt) > 2:
+                include_dirs.append(opt[2:])
+        for src in sorted(p4_sources(self.p4_src, include_dirs)):
+            h.update(src.encode())
+            with open(src, 'rb') as f:
+                h.update(f.read())
+        # Compiler
+        p4c_path = shutil.which(self.p4c_bin)
+        if p4c_path is not None:
+            p4c_path = os.path.realpath(p4c_path)
+            h.update(repr((p4c_path, os.stat(p4c_path).st_mtime_ns)).encode())
+            p = subprocess.run([p4c_path, '--version'],
+                               stdin=subprocess.DEVNULL,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT)
+            h.update(p.stdout)
+        # Options
+        h.update(repr((self.opts, self.p4rt)).encode())
+        return h.hexdigest()
+
+    def load_cache(self, key):
+        """Copies the cached outputs to the output directory.
+
+        Args:
+            key (str): cache key (see :py:meth:`cache_key`)
+
+        Returns:
+            bool: **True** if the outputs were found in the cache, **False** otherwise.
+        """
+        json_cache = os.path.join(self.cache_dir, key + '.json')
+        p4rt_cache = os.path.join(self.cache_dir, key + '_p4rt.txt')
+        warnings_cache = os.path.join(self.cache_dir, key + '.warnings')
+        if not os.path.isfile(json_cache):
+            return False
+        if self.p4rt and not os.path.isfile(p4rt_cache):
+            return False
+        debug('cache hit: {}\n'.format(key))
+        shutil.copyfile(json_cache, self.json_out)
+        if self.p4rt:
+            shutil.copyfile(p4rt_cache, self.p4rt_out)
+        # Show the warnings of the cached compilation
+        if os.path.isfile(warnings_cache):
+            info('{} loaded from cache (compiled with warnings).\n'.format(self.p4_src))
+            with open(warnings_cache, 'r') as f:
+                warning(f.read())
+        else:
+            info('{} loaded from cache.\n'.format(self.p4_src))
+        return True
+
+    def save_cache(self, key, warnings=''):
+        """Copies the compiled outputs to the cache.
+
+        Args:
+            key (str)     : cache key (see :py:meth:`cache_key`)
+            warnings (str): warnings issued by the compiler
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if self.p4rt:
+                shutil.copyfile(self.p4rt_out,
+                                os.path.join(self.cache_dir, key + '_p4rt.txt'))
+            if warnings:
+                with open(os.path.join(self.cache_dir, key + '.warnings'), 'w') as f:
+                    f.write(warnings)
+            # The JSON output is copied last, since it marks the entry as complete
+            shutil.copyfile(self.json_out,
+                            os.path.join(self.cache_dir, key + '.json'))
+        except OSError as e:
+            warning('could not cache {}: {}\n'.format(self.p4_src, e))
 
     def get_json_out(self):
         """Returns the JSON configuration filepath."""
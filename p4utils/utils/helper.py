@@ -15,8 +15,15 @@ import psutil
 import signal
 import hashlib
 import importlib
+from itertools import count
 from networkx.readwrite.json_graph import node_link_graph
 
+# Faster JSON parser, if available
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from p4utils.utils.topology import NetworkGraph
 from p4utils.mininetlib.log import info, output, error, warning, debug
 
@@ -120,6 +127,24 @@ def next_element(elems, minimum=None, maximum=None):
             raise Exception('too many elements in the list.')
 
 
+def free_elements(elems, minimum=0):
+    """Yields, in increasing order, the integers not present in the set,
+    starting from minimum. Every yielded value is added to the set, so
+    that generators sharing the same set never yield the same value.
+
+    Args:
+        elems (set)  : set of integers already in use
+        minimum (int): minimum value allowed for elements
+
+    Yields:
+        int: the lowest number not already present in the set.
+    """
+    for elem in count(minimum):
+        if elem not in elems:
+            elems.add(elem)
+            yield elem
+
+
 def rand_mac():
     """Generate a random, non-multicas MAC address.
 
@@ -260,6 +285,22 @@ def is_compiled(p4_src, compilers):
         return False
 
 
+def load_json(json_file):
+    """Load a JSON file, using :py:mod:`orjson` if it is installed.
+
+    Args:
+        json_file (str): path to the JSON file
+
+    Returns:
+        the parsed JSON object.
+    """
+    if orjson is not None:
+        with open(json_file, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(json_file, 'r') as f:
+        return json.load(f)
+
+
 def load_conf(conf_file):
     """Load JSON application configuration file.
 
@@ -269,9 +310,7 @@ def load_conf(conf_file):
     Returns:
         dict: network configuration dictionary.
     """
-    with open(conf_file, 'r') as f:
-        config = json.load(f)
-    return config
+    return load_json(conf_file)
 
 
 def load_topo(json_path):
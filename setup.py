@@ -44,5 +44,7 @@ setup(
         'scapy >= 2.5.0',
         'setuptools',
     ],
-    extras_require={}
+    extras_require={
+        'orjson': ['orjson'],
+    }
 )